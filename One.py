@@ -1,38 +1,36 @@
-import json
 import re
 from typing import Tuple
 from urllib.parse import urljoin, urlsplit
 
+import orjson
 import requests
 from lxml import html
 from lxml.etree import LxmlError
-from requests.exceptions import HTTPError, RequestException
-
-# Sources of inspiration
-# https://stackoverflow.com/a/7160778/8065825
-# https://stackoverflow.com/a/55827638/8065825
-URL_PATTERN = re.compile(
-    # accept only "http" and "https" as per Exercise 1 requirement
-    r"(?:^https?://)"
-    # http basic authentication [optional]
-    r"(?:(\w{1,255}):(.{1,255})@)?"
-    # check full domain length to be less than or equal to 253 (starting after
-    # http basic auth, stopping before port)
-    r"(?:(?:(?=\S{0,253}(?:$|:))"
+from requests.exceptions import RequestException
+
+# Connect and read timeouts in seconds; a host that neither accepts the
+# connection nor sends data within these bounds should not stall the worker
+# indefinitely.
+REQUEST_TIMEOUT = (3.05, 10)
+
+# The structural parts of the URL (scheme, basic auth, port, path, query) are
+# parsed by `urlsplit` directly in C, so only the hostname needs a pattern
+# check. The pattern is anchored and alternation-free, so it cannot backtrack
+# catastrophically on hostile input.
+HOSTNAME_PATTERN = re.compile(
     # check for at least one subdomain (maximum length per subdomain: 63
     # characters), dashes in between allowed
-    r"((?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+"
+    r"(?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+"
     # check for top level domain, no dashes allowed
-    r"(?:[a-z0-9]{1,63})))"
-    # accept also "localhost" only
-    r"|localhost)"
-    # port [optional]
-    r"(:\d{1,5})?"
-    # trailing slash and URL parameters [optional]
-    r"(?:/?|[/?]\S+)$",
-    re.IGNORECASE,
+    r"[a-z0-9]{1,63}$",
+    # ASCII keeps IGNORECASE from applying Unicode case folding (under which
+    # e.g. the Kelvin sign would match [a-z]); hostnames are ASCII per RFC 3986.
+    re.IGNORECASE | re.ASCII,
 )
 
+# Maximum full domain length as per RFC 1035.
+MAX_HOSTNAME_LENGTH = 253
+
 
 def _is_valid_url(user_input: str) -> bool:
     """Determine if the given user input is a valid URL.
@@ -46,7 +44,69 @@ def _is_valid_url(user_input: str) -> bool:
     Returns:
         bool: `True` if the user input is a valid URL, `False` otherwise.
     """
-    return re.match(URL_PATTERN, user_input) is not None
+    try:
+        components = urlsplit(user_input)
+        hostname = components.hostname
+        # Accessing `port` validates it; it raises `ValueError` if the port is
+        # not an integer or is out of range.
+        components.port
+    except ValueError:
+        return False
+
+    # accept only "http" and "https" as per Exercise 1 requirement
+    if components.scheme not in ("http", "https") or not hostname:
+        return False
+
+    # accept also "localhost" only
+    if hostname == "localhost":
+        return True
+
+    return (
+        len(hostname) <= MAX_HOSTNAME_LENGTH
+        and HOSTNAME_PATTERN.match(hostname) is not None
+    )
+
+
+class _PageDataCollector:
+    """Parser target that collects the required page data in a single pass.
+
+    Captures the page title, the stylesheet count and the image source URLs
+    from the parser events as the document is read, so no element tree has to
+    be built and traversed afterwards.
+    """
+
+    def __init__(self) -> None:
+        self.title = ""
+        self.stylesheets = 0
+        self.image_urls = []
+        self.has_relative_image_urls = False
+        self._title_parts = []
+        self._in_title = False
+        self._title_seen = False
+
+    def start(self, tag: str, attrib: dict) -> None:
+        if tag == "title" and not self._title_seen:
+            self._in_title = True
+        elif tag == "link" and attrib.get("rel") == "stylesheet":
+            self.stylesheets += 1
+        elif tag == "img" and "src" in attrib:
+            src = attrib["src"]
+            if not src.startswith(("http://", "https://")):
+                self.has_relative_image_urls = True
+            self.image_urls.append(src)
+
+    def end(self, tag: str) -> None:
+        if tag == "title" and self._in_title:
+            self._in_title = False
+            self._title_seen = True
+            self.title = "".join(self._title_parts)
+
+    def data(self, data: str) -> None:
+        if self._in_title:
+            self._title_parts.append(data)
+
+    def close(self) -> "_PageDataCollector":
+        return self
 
 
 class Worker:
@@ -66,44 +126,54 @@ class Worker:
 
         return False
 
-    def _get_page_source(self) -> bool:
-        """Retrieve the page source from the user URL.
+    def _get_page_data(self) -> bool:
+        """Retrieve and parse the page at the user URL; store required data.
+
+        Notes:
+            The response is streamed into the parser chunk by chunk, so
+            parsing overlaps with the download and the page source is never
+            buffered in full.
 
         Returns:
             bool: `True` if successful, `False` otherwise.
         """
+        collector = _PageDataCollector()
+        parser = html.HTMLParser(target=collector)
+        received = False
+
         try:
-            response = requests.get(self.url)
-            response.raise_for_status()
-        except HTTPError or RequestException:
-            return False
+            with requests.get(
+                    self.url, stream=True, timeout=REQUEST_TIMEOUT
+            ) as response:
+                response.raise_for_status()
 
-        if 'text/html' in response.headers['content-type']:
-            self.page_source = response.content
-            return True
+                if 'text/html' not in response.headers['content-type']:
+                    return False
 
-        return False
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    parser.feed(chunk)
+                    received = True
 
-    def _parse_page_source(self) -> bool:
-        """Parse the page source, and retrieve and store the required data.
+                if not received:
+                    return False
 
-        Returns:
-            bool: `True` if successful, `False` otherwise.
-        """
-        try:
-            root = html.fromstring(self.page_source)
+                parser.close()
+        except RequestException:
+            # Covers HTTPError as well as timeouts, DNS and SSL failures, all
+            # of which are subclasses of RequestException.
+            return False
         except LxmlError:
             return False
 
-        title = root.xpath("./head/title")
-        self.title = title[0].text if len(title) else ""
+        self.title = collector.title
 
         # While stylesheets are generally loaded in `<head>`, they may also be
         # found in `<body>`.
-        self.stylesheets = len(root.xpath(".//link[@rel='stylesheet']"))
+        self.stylesheets = collector.stylesheets
 
-        self.image_urls = root.xpath("./body//img/@src")
+        self.image_urls = collector.image_urls
         self.images = len(self.image_urls)
+        self.has_relative_image_urls = collector.has_relative_image_urls
 
         return True
 
@@ -111,10 +181,15 @@ class Worker:
         """Ensure that all image URLs are absolute.
         For relative image URLs, add the missing components from the page URL.
         """
-        for i in range(self.images):
-            components = urlsplit(self.image_urls[i])
-            if not (components.scheme and components.netloc):
-                self.image_urls[i] = urljoin(self.url, self.image_urls[i])
+        base_url = self.url
+        # A prefix check is enough to spot already-absolute URLs; anything
+        # else (including protocol-relative "//" URLs) goes through `urljoin`,
+        # which leaves absolute URLs it receives untouched anyway.
+        self.image_urls = [
+            url if url.startswith(("http://", "https://"))
+            else urljoin(base_url, url)
+            for url in self.image_urls
+        ]
 
     def _generate_output(self) -> None:
         """Generate and store the output dict.
@@ -138,14 +213,20 @@ class Worker:
         if not self._get_valid_user_url():
             return "Sorry, you entered an invalid or unsupported URL.", 1
 
-        if not (self._get_page_source() and self._parse_page_source()):
+        if not self._get_page_data():
             return f"Sorry, your URL does not link to a valid HTML page.", 1
 
-        self._ensure_img_abs_urls()
+        # Many pages reference their images exclusively through absolute CDN
+        # URLs; the collector flags relative sources during the parse so the
+        # extra pass can be skipped entirely in that case.
+        if self.has_relative_image_urls:
+            self._ensure_img_abs_urls()
 
         self._generate_output()
 
-        return json.dumps(self.output, indent=2), 0
+        output = orjson.dumps(self.output, option=orjson.OPT_INDENT_2)
+
+        return output.decode(), 0
 
 
 def main():
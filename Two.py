@@ -2,24 +2,83 @@
 #   "Monthly exchange rate" means "monthly average exchange rate"
 #   "Official ECB rate" means "latest daily average rate"
 
-from time import gmtime, mktime, strftime
-from urllib.parse import urljoin
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from typing import IO
 
+import orjson
 import requests
 from lxml import etree
+from requests.adapters import HTTPAdapter
 
 BITCOIN_TICKER = "https://blockchain.info/ticker"
 
 DATE_FORMAT = "%Y-%m-%d"
+MONTH_FORMAT = "%Y-%m"
 
 ECB_DATA_API = "https://sdw-wsrest.ecb.europa.eu/service/data/"
 ECB_EXR_GBP_EUR = "EXR/{0}.GBP.EUR.SP00.A"
 ECB_QUERY_PARAMS = "?startPeriod={0}&endPeriod={1}&detail=dataonly"
 
+# The SDMX XML is verbose; asking for gzip explicitly cuts the wire bytes by
+# roughly an order of magnitude, and the parser receives the decompressed
+# stream transparently via `decode_content`.
+ECB_REQUEST_HEADERS = {
+    "Accept": "application/xml",
+    "Accept-Encoding": "gzip",
+}
+
+ECB_GENERIC_NS = "http://www.sdmx.org/resources/sdmxml/schemas/v2_1/data/generic"
+ECB_OBS_TAG = f"{{{ECB_GENERIC_NS}}}Obs"
+ECB_OBS_VALUE_TAG = f"{{{ECB_GENERIC_NS}}}ObsValue"
+
 FREQUENCY_DAILY = "D"
 FREQUENCY_MONTHLY = "M"
 
-TEN_DAYS_SECONDS = 60 * 60 * 24 * 10
+# Connect and read timeouts in seconds; a host that neither accepts the
+# connection nor sends data within these bounds should not stall the worker
+# indefinitely.
+REQUEST_TIMEOUT = (3.05, 10)
+
+
+def _utc_today() -> date:
+    """Return today's date (UTC).
+
+    Returns:
+        date: Today's date.
+    """
+    return datetime.now(timezone.utc).date()
+
+
+@lru_cache(maxsize=8)
+def _format_date(ordinal: int) -> str:
+    """Format the date with the given ordinal as YYYY-MM-DD.
+
+    Notes:
+        Caching on the ordinal means repeated calls on the same day reuse the
+        formatted string; the cache invalidates itself as the date rolls over.
+
+    Args:
+        ordinal (int): The proleptic Gregorian ordinal of the date.
+
+    Returns:
+        str: The formatted date.
+    """
+    return date.fromordinal(ordinal).strftime(DATE_FORMAT)
+
+
+@lru_cache(maxsize=8)
+def _format_month(ordinal: int) -> str:
+    """Format the month of the date with the given ordinal as YYYY-MM.
+
+    Args:
+        ordinal (int): The proleptic Gregorian ordinal of the date.
+
+    Returns:
+        str: The formatted month.
+    """
+    return date.fromordinal(ordinal).strftime(MONTH_FORMAT)
 
 
 def _today() -> str:
@@ -31,7 +90,7 @@ def _today() -> str:
     Returns:
         str: The formatted date.
     """
-    return strftime(DATE_FORMAT, gmtime())
+    return _format_date(_utc_today().toordinal())
 
 
 def _ten_days_ago() -> str:
@@ -43,9 +102,7 @@ def _ten_days_ago() -> str:
     Returns:
         str: The formatted date.
     """
-    ten_days_ago = gmtime(mktime(gmtime()) - TEN_DAYS_SECONDS)
-
-    return strftime(DATE_FORMAT, ten_days_ago)
+    return _format_date((_utc_today() - timedelta(days=10)).toordinal())
 
 
 def _last_month() -> str:
@@ -57,18 +114,21 @@ def _last_month() -> str:
     Returns:
         str: The formatted month.
     """
-    time_now = gmtime()
+    end_of_last_month = _utc_today().replace(day=1) - timedelta(days=1)
 
-    return (
-        f"{time_now.tm_year}-{time_now.tm_mon - 1:02d}" if time_now.tm_mon > 1
-        else f"{time_now.tm_year - 1}-12"
-    )
+    return _format_month(end_of_last_month.toordinal())
 
 
-def _get_ecb_data(frequency: str, start: str, end: str) -> bytes:
-    """Retrieve the ECB exchange rate data based on the arguments provided.
+def _get_ecb_rate(
+        session: requests.Session, frequency: str, start: str, end: str
+) -> float:
+    """Retrieve the latest ECB exchange rate based on the arguments provided.
 
     Args:
+        session (requests.Session): The HTTP session used for the request;
+        reusing the same session keeps the connection to the ECB host alive
+        across requests.
+
         frequency (str): The frequency of the exchange rate.
 
         start (str): The start date of the period for which the exchange rate
@@ -81,53 +141,79 @@ def _get_ecb_data(frequency: str, start: str, end: str) -> bytes:
         See https://sdw-wsrest.ecb.europa.eu/help/ for further details.
 
     Returns:
-        bytes: The requested data.
+        float: The latest exchange rate in the requested period.
     """
-    content = bytearray()
-
-    query_url = urljoin(ECB_DATA_API, ECB_EXR_GBP_EUR.format(frequency))
-    query_url = urljoin(query_url, ECB_QUERY_PARAMS.format(start, end))
+    query_url = (
+        ECB_DATA_API
+        + ECB_EXR_GBP_EUR.format(frequency)
+        + ECB_QUERY_PARAMS.format(start, end)
+    )
 
-    with requests.get(query_url) as response:
+    with session.get(
+            query_url,
+            headers=ECB_REQUEST_HEADERS,
+            stream=True,
+            timeout=REQUEST_TIMEOUT,
+    ) as response:
         response.raise_for_status()
-        # The data we're requesting is relatively small so we can just read it
-        # one chunk; to do that we'll set the chunk size to something bigger
-        # than the data we're reading. Based on some trial and error, it looks
-        # like 3 KBytes is the right number.
-        for chunk in response.iter_content(chunk_size=1024 * 3):  # 3 KBytes
-            content.extend(chunk)
+        # Feed the raw socket straight into libxml2 rather than buffering the
+        # whole body in Python first; decode_content makes urllib3 transparently
+        # decompress the stream for the parser.
+        response.raw.decode_content = True
+        return _get_latest_ecb_rate(response.raw)
 
-    return bytes(content)
 
-
-def _get_latest_ecb_rate(data: bytes) -> float:
-    """Retrieve the latest exchange rate from the given ECB data.
+def _get_latest_ecb_rate(stream: IO[bytes]) -> float:
+    """Retrieve the latest exchange rate from the given ECB data stream.
 
     Notes:
         The exchange rates are provided in chronological order in the ECB data
-        so we just pick the last value in the list.
+        so we keep the last value seen while walking the document in a single
+        pass. Observations are discarded as soon as they have been read, so the
+        document is never fully materialized in memory.
 
     Args:
-        data (bytes): The ECB data.
+        stream (IO[bytes]): A file-like object yielding the ECB data.
 
     Returns:
         float: The latest exchange rate retrieved from the ECB data.
     """
-    root = etree.fromstring(data)
-    values = root.xpath('.//generic:ObsValue/@value', namespaces=root.nsmap)
-    last_value = len(values) - 1
+    last_value = None
+
+    for _, obs in etree.iterparse(stream, events=("end",), tag=ECB_OBS_TAG):
+        obs_value = obs.find(ECB_OBS_VALUE_TAG)
+        if obs_value is not None:
+            last_value = obs_value.get("value")
+
+        obs.clear()
+        while obs.getprevious() is not None:
+            del obs.getparent()[0]
 
-    return float(values[last_value])
+    return float(last_value)
 
 
 class Worker:
 
+    def __init__(self) -> None:
+        """Set up the HTTP session shared by all the requests made by the
+        worker. Keeping the connections alive avoids repeating the TCP and TLS
+        handshakes for requests made to the same host.
+        """
+        self.session = requests.Session()
+        self.session.mount(
+            "https://", HTTPAdapter(pool_connections=4, pool_maxsize=4)
+        )
+
     def _get_btc_eur_15min(self) -> None:
         """Retrieve and store the 15min delayed BTC market price in EUR.
         """
-        with requests.get(BITCOIN_TICKER) as response:
+        with self.session.get(
+                BITCOIN_TICKER, timeout=REQUEST_TIMEOUT
+        ) as response:
             response.raise_for_status()
-            json_data = response.json()
+            # Parse the raw bytes directly; response.json() would first run
+            # charset detection and decode the body to str.
+            json_data = orjson.loads(response.content)
 
         self.btc_eur_15min = json_data["EUR"]["15m"]
 
@@ -135,43 +221,54 @@ class Worker:
         """Retrieve and store last month's EUR to GBP average rate.
         """
         last_month = _last_month()
-        data = _get_ecb_data(FREQUENCY_MONTHLY, last_month, last_month)
 
-        self.eur_gbp_last_month = _get_latest_ecb_rate(data)
+        self.eur_gbp_last_month = _get_ecb_rate(
+            self.session, FREQUENCY_MONTHLY, last_month, last_month
+        )
 
     def _get_eur_gbp_last_daily(self) -> None:
         """Retrieve and store the latest daily EUR to GBP average rate.
         """
-        data = _get_ecb_data(FREQUENCY_DAILY, _ten_days_ago(), _today())
-
-        self.eur_gbp_last_day = _get_latest_ecb_rate(data)
+        self.eur_gbp_last_day = _get_ecb_rate(
+            self.session, FREQUENCY_DAILY, _ten_days_ago(), _today()
+        )
 
     def _get_btc_gbp_15min(self) -> None:
         """Calculate the 15min delayed BTC market price in GBP.
 
         Notes: This is calculated from the 15min delayed BTC market price in EUR
-        using the ECB official latest daily average rate from EUR to GBP.
+        using the ECB official latest daily average rate from EUR to GBP, both
+        of which must have been retrieved already.
         """
-        self._get_eur_gbp_last_daily()
-
         self.btc_gbp_15min = self.btc_eur_15min * self.eur_gbp_last_day
 
     def do_work(self) -> None:
         """Retrieve and display the data requested in the requirements.
+
+        Notes:
+            The three network requests are independent of each other so they
+            are issued concurrently; the overall wall time is then bound by
+            the slowest request rather than the sum of all three.
         """
-        self._get_btc_eur_15min()
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            futures = [
+                executor.submit(self._get_btc_eur_15min),
+                executor.submit(self._get_eur_gbp_last_month),
+                executor.submit(self._get_eur_gbp_last_daily),
+            ]
+            for future in futures:
+                future.result()
+
+        self._get_btc_gbp_15min()
+
         print(
             f"1 BTC = {self.btc_eur_15min} EUR"
             f"\t\t(15min delayed market price)"
         )
-
-        self._get_eur_gbp_last_month()
         print(
             f"1 EUR = {self.eur_gbp_last_month} GBP"
             f"\t(last month average rate)"
         )
-
-        self._get_btc_gbp_15min()
         print(
             f"1 BTC = {self.btc_gbp_15min:.6f} GBP"
             f"\t(BTC 15min delayed market price; GBP latest daily average rate)"